@@ -7,6 +7,7 @@ set -euo pipefail
 READSDIR=""
 OUTDIR="."
 FLYE_CMD="flye"
+COMPRESS_SCRIPT="$(dirname "$0")/tools/Compress_fasta.py"
 THREADS_PER_JOB=32
 MAX_JOBS=""
 FORCE_OVERWRITE=false
@@ -26,6 +27,8 @@ Optional:
   -t, --threads INT       Threads per Flye job (default: 32)
   -j, --jobs INT          Max concurrent jobs (default: auto)
       --flye PATH         Flye executable (default: flye in PATH)
+      --compress-script PATH
+                          Compress_fasta.py path (default: tools/ next to this script)
       --overwrite         Overwrite existing output directories
   -h, --help              Show this help message
 
@@ -61,6 +64,10 @@ while [[ $# -gt 0 ]]; do
       FLYE_CMD="$2"
       shift 2
       ;;
+    --compress-script)
+      COMPRESS_SCRIPT="$2"
+      shift 2
+      ;;
     --overwrite)
       FORCE_OVERWRITE=true
       shift
@@ -175,13 +182,13 @@ for fq in "${FASTQ_FILES[@]}"; do
       echo "[$(date)] DONE $sample" >> "$sample_log"
       FINAL_FASTA="${sample_outdir}/assembly.fasta"
       FINAL_INFO="${sample_outdir}/assembly_info.txt"
-      OUT_FASTA="${OUTDIR}/${sample}.flye.fasta"
+      OUT_FASTA="${OUTDIR}/${sample}.flye.fasta.gz"
       OUT_INFO="${OUTDIR}/${sample}.flye_info.txt"
       if [[ ! -s "$FINAL_FASTA" || ! -s "$FINAL_INFO" ]]; then
         echo "[$(date)] ERROR: Flye output missing for $sample" >> "$sample_log"
         exit 1
       fi
-      cp -f "$FINAL_FASTA" "$OUT_FASTA"
+      python "$COMPRESS_SCRIPT" -i "$FINAL_FASTA" -o "$OUT_FASTA" -t "$THREADS_PER_JOB" >> "$sample_log" 2>&1
       cp -f "$FINAL_INFO" "$OUT_INFO"
       echo "[$(date)] Exported Flye results" >> "$sample_log"
     else
@@ -7,6 +7,7 @@ set -euo pipefail
 READSDIR=""
 OUTDIR="."
 NECAT_CMD="necat.pl"
+COMPRESS_SCRIPT="$(dirname "$0")/tools/Compress_fasta.py"
 MAX_JOBS=4
 
 # NECAT options
@@ -40,6 +41,7 @@ Required:
 Optional:
   -o, --outdir DIR           Output directory (default: .)
   -n, --necat PATH           necat.pl path or command (default: necat.pl)
+      --compress-script PATH Compress_fasta.py path (default: tools/ next to this script)
   -j, --jobs INT             Max concurrent samples (default: 4)
   -t, --threads INT          Threads per sample (default: 32)
   -g, --genome-size INT      Genome size (default: 12000000)
@@ -81,6 +83,7 @@ while [[ $# -gt 0 ]]; do
     -r|--reads) READSDIR="$2"; shift 2;;
     -o|--outdir) OUTDIR="$2"; shift 2;;
     -n|--necat) NECAT_CMD="$2"; shift 2;;
+    --compress-script) COMPRESS_SCRIPT="$2"; shift 2;;
     -j|--jobs) MAX_JOBS="$2"; shift 2;;
     -t|--threads) THREADS="$2"; shift 2;;
     -g|--genome-size) GENOME_SIZE="$2"; shift 2;;
@@ -231,8 +234,8 @@ EOF
 
     FINAL_FASTA="$SAMPLE_DIR/6-bridge_contigs/polished_contigs.fasta"
     if [[ -f "$FINAL_FASTA" ]]; then
-      cp -f "$FINAL_FASTA" "$OUTDIR/${PREFIX}.necat.fasta"
-      echo "✅ Finished: $OUTDIR/${PREFIX}.necat.fasta"
+      python "$COMPRESS_SCRIPT" -i "$FINAL_FASTA" -o "$OUTDIR/${PREFIX}.necat.fasta.gz" -t "$THREADS"
+      echo "✅ Finished: $OUTDIR/${PREFIX}.necat.fasta.gz"
     else
       echo "❌ No assembly fasta found for $PREFIX"
       echo "   Expected: $FINAL_FASTA"
@@ -12,6 +12,7 @@ PARALLEL_JOBS=2
 GENOME_SIZE=12000000
 
 NEXTDENOVO_CMD="nextDenovo"  
+COMPRESS_SCRIPT="$(dirname "$0")/tools/Compress_fasta.py"
 
 usage() {
 cat <<EOF
@@ -23,6 +24,8 @@ Options:
   -t, --threads INT      threads for minimap2 (default: 16)
   -j, --jobs INT         parallel samples (default: 2)
   -g, --genome INT       genome size bp (default: 12000000)
+      --compress-script PATH
+                         Compress_fasta.py path (default: tools/ next to this script)
   -h, --help             show help
 
 Example:
@@ -44,6 +47,7 @@ while [[ $# -gt 0 ]]; do
     -t|--threads) THREADS="$2"; shift 2 ;;
     -j|--jobs)    PARALLEL_JOBS="$2"; shift 2 ;;
     -g|--genome)  GENOME_SIZE="$2"; shift 2 ;;
+    --compress-script) COMPRESS_SCRIPT="$2"; shift 2 ;;
     -h|--help)    usage; exit 0 ;;
     *) echo "ERROR: Unknown option: $1"; usage; exit 1 ;;
   esac
@@ -139,8 +143,8 @@ EOF
 
     FINAL_FASTA="$SAMPLE_DIR/03.ctg_graph/nd.asm.fasta"
     if [[ -f "$FINAL_FASTA" ]]; then
-      cp -f "$FINAL_FASTA" "$WORKDIR/${PREFIX}.nextdenovo.fasta"
-      echo "✅ Finished: $WORKDIR/${PREFIX}.nextdenovo.fasta"
+      python "$COMPRESS_SCRIPT" -i "$FINAL_FASTA" -o "$WORKDIR/${PREFIX}.nextdenovo.fasta.gz" -t "$THREADS"
+      echo "✅ Finished: $WORKDIR/${PREFIX}.nextdenovo.fasta.gz"
     else
       echo "❌ No assembly fasta found for $PREFIX"
       echo "   Expected: $FINAL_FASTA"
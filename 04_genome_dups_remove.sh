@@ -12,7 +12,7 @@ cat <<EOF
 Usage: $(basename "$0") [options]
 
 Options:
-  -i, --input DIR        Input FASTA directory (default: ./result/assembly/denovo)
+  -i, --input DIR        Input FASTA directory, .fasta or .fasta.gz (default: ./result/assembly/denovo)
   -o, --outdir DIR       Output directory (default: ./result/clean/denovo)
   -s, --script PATH      Remove_dups.py path (default: ./tools/Remove_dups.py)
   -t, --threads INT      Parallel jobs (default: 32)
@@ -80,16 +80,23 @@ echo "========================================="
 # generate command list
 #######################################
 shopt -s nullglob
-FASTA_FILES=("$RAW_DIR"/*.fasta)
+FASTA_FILES=("$RAW_DIR"/*.fasta "$RAW_DIR"/*.fasta.gz)
 shopt -u nullglob
 
 if [[ ${#FASTA_FILES[@]} -eq 0 ]]; then
-  echo "❌ No .fasta files found in $RAW_DIR"
+  echo "❌ No .fasta or .fasta.gz files found in $RAW_DIR"
   exit 1
 fi
 
 for fasta in "${FASTA_FILES[@]}"; do
-  name=$(basename "$fasta" .fasta)
+  # Prefer the compressed export when both X.fasta and X.fasta.gz exist,
+  # so that a single job writes the outputs of X
+  if [[ "$fasta" == *.fasta && -f "$fasta.gz" ]]; then
+    echo "⚠️  Skip $fasta (using $fasta.gz)"
+    continue
+  fi
+  name=$(basename "$fasta" .gz)
+  name=${name%.fasta}
   out="$OUT_DIR/$name"
   echo "python $SCRIPT -d $fasta -o $out" >> "$COMMANDS"
 done
@@ -0,0 +1,46 @@
+#!/home/qinti/miniconda3/envs/Genome_as/bin/python
+# -*- coding: utf8 -*-
+#----------------------------------------------------------------------------
+# Created By  : qinti
+# Created Date: 2026/10/19
+# version ='1.0'
+# ---------------------------------------------------------------------------
+'''
+This script writes a BGZF compressed copy of a fasta file, with its samtools 
+index files (.fai and .gzi) for random access. 
+
+It takes as input :
+	-i --input: fasta file to compress (plain or compressed)
+	-o --output: compressed output fasta (.gz)
+	-t --threads: number of compression threads
+	--noIndex: do not write the .fai and .gzi index files
+'''
+# ---------------------------------------------------------------------------
+import argparse
+import time
+from Tools import *
+# ---------------------------------------------------------------------------
+
+# =============
+# Get arguments
+# =============
+
+# Initiate the parser
+parser = argparse.ArgumentParser(description = 
+'''
+This script writes a BGZF compressed copy of a fasta file, with its samtools 
+index files (.fai and .gzi) for random access. 
+'''
+)
+parser.add_argument("-i", "--input", help="fasta file to compress (plain or compressed)", required=True)
+parser.add_argument("-o", "--output", help="compressed output fasta (.gz)", required=True)
+parser.add_argument("-t", "--threads", help="Number of compression threads", type=int, default=1)
+parser.add_argument("--noIndex", help="Do not write the .fai and .gzi index files", action="store_true")
+
+# Read arguments from the command line
+args = parser.parse_args()
+
+start = time.time()
+Fasta(args.input).toFile(args.output, compress = True, threads = args.threads, index = not args.noIndex)
+end = time.time()
+print(f"{args.input} compressed to {args.output}: ran in {round(end-start)}s")
@@ -10,9 +10,16 @@ This script remove redundant contigs. If one contig is fully covered
 (95% threshold) by other contigs of the draft assembly, the contig is removed. 
 
 It takes as input :
-	-d --draft: a draft genome assembly to reorder (multi fasta)
+	-d --draft: a draft genome assembly to reorder (multi fasta, plain or 
+				gzip/BGZF compressed)
 	-o --output: output prefix
 	-b --blastPath: Path to blast+, if not in path
+	-c --cache: binary BED cache of the draft non-N regions. It is reused 
+				only if it was computed from this draft (same path, size and 
+				modification time), and rewritten otherwise. An existing 
+				file that is not a binary BED is never overwritten. 
+	-m --multiCopy: also write PREFIX.multicopy.bed, the regions of non 
+					redundant contigs covered by 2 or more other contigs
 
 
 blast+ is used in this script. If blast+ is not in the path, the path can
@@ -50,6 +57,8 @@ be added to the variable blast.
 parser.add_argument("-d", "--draft", help="draft genome assembly (multi fasta)", required=True)
 parser.add_argument("-o", "--output", help="Prefix of the output file", required=True)
 parser.add_argument("-b", "--blastPath", help="Path to blast+ function, if not in path", type=str, default="")
+parser.add_argument("-m", "--multiCopy", help="Write regions covered by 2 or more other contigs to PREFIX.multicopy.bed", action="store_true")
+parser.add_argument("-c", "--cache", help="Binary BED cache of the draft non-N regions, reused if computed from the same draft (path, size, mtime), rewritten otherwise", type=str, default=None)
 
 # Read arguments from the command line
 args = parser.parse_args()
@@ -57,6 +66,8 @@ args = parser.parse_args()
 draftPath=args.draft
 outputPath=args.output
 blast=args.blastPath
+cachePath=args.cache
+multiCopy=args.multiCopy
 if blast != "" and not blast.endswith("/") :
 	blast += "/"
 
@@ -76,14 +87,22 @@ blastResultsPath = datetime.now().strftime("%Y_%m_%d_%H_%M_%S_%m_%f") + "_" + st
 
 
 # Run Blastn of draft against itself
+# blast+ only reads plain fasta: compressed drafts are written to a temporary file
 start = time.time()
-blastn(draftPath, draftPath, blast, blastResultsPath)
+if isCompressed(draftPath):
+	blastDraftPath = blastResultsPath + ".fasta"
+	draftFasta.toFile(blastDraftPath, compress = False)
+else:
+	blastDraftPath = draftPath
+blastn(blastDraftPath, blastDraftPath, blast, blastResultsPath)
+if blastDraftPath != draftPath:
+	os.remove(blastDraftPath)
 end = time.time()
 print("Alignment done: ran in "+str(round(end-start))+"s")
 
 # Get BED of the draft assemblies (BEDcoordinates without N nucleotides)
 start = time.time()
-draftBED = getBED(draftPath)
+draftBED = getBED(draftPath, cachePath)
 end = time.time()
 print(f"Draft BED obtained: ran in {round(end-start)}s")
 
@@ -165,26 +184,29 @@ while max(overlap) >= 85:
 end = time.time()
 print("Coverage analysis completed: ran in "+str(round(end-start))+"s")
 
-# Create Fasta objects with redundant and non redundant contigs
-nonRedundantContigs = Fasta()
-redundantContigs = Fasta()
-for i in range(len(draftFasta)):
-	seq = draftFasta.sequences[i]
-	if i in contigsRemoved:
-		redundantContigs += Fasta([seq])
-	else:
-		nonRedundantContigs += Fasta([seq])
-
-# Write output to 2 files: PREFIX.NoRedundantContigs.fasta and PREFIX.removedContigs.fasta
-nonRedundantContigs.toFile(outputPath+".NR.fasta")
-
+# Write output to 2 files in one pass: PREFIX.NR.fasta (non redundant contigs) 
+# and PREFIX.RM.fasta (removed contigs)
+removedIDs = [draftFasta.sequences[i].id for i in contigsRemoved]
 if len(contigsRemoved) > 0 :
-	redundantContigs.toFile(outputPath+".RM.fasta")
+	draftFasta.partition({outputPath+".RM.fasta": removedIDs}, default = outputPath+".NR.fasta")
+else:
+	draftFasta.toFile(outputPath+".NR.fasta")
 
 if len(contigsRemoved) > 0 :
 	print("\nContigs removed: ")
 	print("\tContig\t% covered")
-	for seq in redundantContigs:
-		print(f"\t{seq.id}\t{contigsRemovedCoverage[redundantContigs.sequences.index(seq)]}")
+	removedCoverage = dict(zip(contigsRemoved, contigsRemovedCoverage))
+	for i in sorted(contigsRemoved):
+		print(f"\t{draftFasta.sequences[i].id}\t{removedCoverage[i]}")
 else:
 	print("\nNo contig removed")
+
+# Regions of non redundant contigs covered by at least 2 other non redundant contigs
+# (collapsed repeats or haplotigs)
+if multiCopy:
+	removedSet = set(contigsRemoved)
+	keptContigs = [i for i in range(len(draftFasta)) if i not in removedSet]
+	depth = Depth([analysisMatrix[i][j] for i in keptContigs for j in keptContigs if i != j])
+	multiCopyBED = depth.atLeast(2) & draftBED
+	multiCopyBED.toFile(outputPath+".multicopy.bed", oneBased = True) # Blast coordinates are 1-based
+	print(f"\nMulti-copy regions: {len(multiCopyBED)} bp in {multiCopyBED.nbIDs} contigs")
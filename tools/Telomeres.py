@@ -0,0 +1,169 @@
+#!/home/qinti/miniconda3/envs/Genome_as/bin/python
+# -*- coding: utf8 -*-
+#----------------------------------------------------------------------------
+# Created By  : qinti
+# Created Date: 2026/10/19
+# version ='1.0'
+# ---------------------------------------------------------------------------
+'''
+This script searches telomeric repeats (or any set of motifs) at the ends 
+of the contigs of several assemblies, to assess chromosome completeness. 
+Each motif is compiled once in each process and scanned separately, so 
+overlapping motifs all report their hits. Assemblies are scanned in 
+parallel on a pool of processes. 
+
+By default, yeast telomeric repeats are searched: C1-3A at the left end and
+TG1-3 at the right end of each contig (this holds whatever the orientation 
+of the contig). 
+
+It takes as input :
+	-i --input: assemblies to scan (multi fasta, plain or compressed)
+	-o --output: output prefix
+	-t --threads: number of processes
+	-e --endLength: length of contig ends scanned (default: 2000)
+	-m --minLength: minimal length of a motif hit (default: 50)
+	-w --whole: scan whole contigs instead of contig ends
+	--motif: motif to search, as NAME=REGEX (can be repeated, replaces the 
+			 telomeric motifs CA and TG)
+	--leftMotif, --rightMotif: motifs reported at the left and right ends 
+							   in the summary (default: CA and TG, or the 
+							   first and last --motif if given)
+
+It outputs :
+	PREFIX.telomeres.bed: motif hits (contig, start, end, motif, assembly)
+	PREFIX.telomeres.tsv: for each contig, bp of the left (right) motif 
+						  found at the left (right) end
+'''
+# ---------------------------------------------------------------------------
+import re
+import os
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Tools import *
+# ---------------------------------------------------------------------------
+# Yeast telomeric repeats, as regular expressions
+TELOMERE_MOTIFS = {"CA": "(?:C{1,3}A){5,}", "TG": "(?:TG{1,3}){5,}"}
+
+# Motifs already compiled in this process, by motif set
+_compiledMotifs = {}
+
+# ---------------------------------------------------------------------------
+# Definitions
+def compileMotifs(motifs):
+	# Return a dictionary {name: compiled case insensitive regular expression}. 
+	# Motif sets are compiled once per process, then reused
+	key = tuple(motifs.items())
+	if key not in _compiledMotifs:
+		_compiledMotifs[key] = {name: re.compile(motif, re.IGNORECASE) if isinstance(motif, str) else motif for name, motif in motifs.items()}
+	return _compiledMotifs[key]
+
+def scanSequence(seq:str, motifs = TELOMERE_MOTIFS, endLength:int = 2000, whole:bool = False, minLength:int = 50):
+	# Return the motif hits of a sequence as a dictionary {motif: [(start, end)]}
+	# (0-based, end excluded). Only contig ends are scanned unless whole is True
+	if whole or len(seq) <= 2 * endLength:
+		regions = [(0, len(seq))]
+	else:
+		regions = [(0, endLength), (len(seq) - endLength, len(seq))]
+	hits = {}
+	for name, pattern in compileMotifs(motifs).items():
+		hits[name] = []
+		for regionStart, regionEnd in regions:
+			hits[name] += [(match.start(), match.end()) for match in pattern.finditer(seq, regionStart, regionEnd) if match.end() - match.start() >= minLength]
+	return hits
+
+def scanAssembly(path, motifs = TELOMERE_MOTIFS, endLength:int = 2000, whole:bool = False, minLength:int = 50, leftMotif:str = "CA", rightMotif:str = "TG"):
+	'''
+	Scan all contigs of an assembly. Return the hits as a dictionary 
+	{motif: BED}, and a summary with, for each contig, [id, length, bp of 
+	leftMotif in the left end, bp of rightMotif in the right end]. 
+	leftMotif and rightMotif must be names of motifs. 
+	'''
+	for name in (leftMotif, rightMotif):
+		if name not in motifs:
+			raise Exception(f"Summary motif {name} is not one of the scanned motifs: {', '.join(motifs)}")
+	hits = {name: [] for name in motifs}
+	summary = []
+	for x in Fasta(path):
+		contigHits = scanSequence(x.seq, motifs, endLength, whole, minLength)
+		for name in motifs:
+			hits[name] += [BEDcoordinates(x.id, start, end) for start, end in contigHits[name]]
+		ends = BED(BEDcoordinates(x.id, 0, min(endLength, len(x))))
+		leftBp = ends.overlapLen(BED([BEDcoordinates(x.id, start, end) for start, end in contigHits[leftMotif]]))
+		ends = BED(BEDcoordinates(x.id, max(len(x) - endLength, 0), len(x)))
+		rightBp = ends.overlapLen(BED([BEDcoordinates(x.id, start, end) for start, end in contigHits[rightMotif]]))
+		summary += [[x.id, len(x), leftBp, rightBp]]
+	return {name: BED(hits[name]) for name in motifs}, summary
+
+def scanAssemblies(paths, motifs = TELOMERE_MOTIFS, threads:int = 1, **kwargs):
+	'''
+	Scan several assemblies on a pool of processes. Return a dictionary 
+	{path: (hits, summary)} with the results of scanAssembly. 
+	'''
+	if threads <= 1 or len(paths) <= 1:
+		return {path: scanAssembly(path, motifs, **kwargs) for path in paths}
+	with ProcessPoolExecutor(max_workers = min(threads, len(paths)), initializer = compileMotifs, initargs = (motifs,)) as pool:
+		futures = {path: pool.submit(scanAssembly, path, motifs, **kwargs) for path in paths}
+		return {path: futures[path].result() for path in paths}
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+	# =============
+	# Get arguments
+	# =============
+
+	# Initiate the parser
+	parser = argparse.ArgumentParser(description = 
+	'''
+	This script searches yeast telomeric repeats (C1-3A at the left end and 
+	TG1-3 at the right end) at the ends of the contigs of several assemblies. 
+	'''
+	)
+	parser.add_argument("-i", "--input", help="Assemblies to scan (multi fasta, plain or compressed)", nargs="+", required=True)
+	parser.add_argument("-o", "--output", help="Prefix of the output files", required=True)
+	parser.add_argument("-t", "--threads", help="Number of processes", type=int, default=1)
+	parser.add_argument("-e", "--endLength", help="Length of contig ends scanned", type=int, default=2000)
+	parser.add_argument("-m", "--minLength", help="Minimal length of a motif hit", type=int, default=50)
+	parser.add_argument("-w", "--whole", help="Scan whole contigs instead of contig ends", action="store_true")
+	parser.add_argument("--motif", help="Motif to search, as NAME=REGEX (can be repeated, replaces the telomeric motifs)", action="append", default=None)
+	parser.add_argument("--leftMotif", help="Motif reported at the left end of contigs in the summary (default: CA, or the first --motif)", type=str, default=None)
+	parser.add_argument("--rightMotif", help="Motif reported at the right end of contigs in the summary (default: TG, or the last --motif)", type=str, default=None)
+
+	# Read arguments from the command line
+	args = parser.parse_args()
+
+	if args.motif is None:
+		motifs = TELOMERE_MOTIFS
+	else:
+		motifs = {}
+		for motif in args.motif:
+			if "=" not in motif:
+				parser.error(f"--motif must be given as NAME=REGEX: {motif}")
+			name, regex = motif.split("=", 1)
+			motifs[name] = regex
+	leftMotif = args.leftMotif if args.leftMotif is not None else list(motifs)[0]
+	rightMotif = args.rightMotif if args.rightMotif is not None else list(motifs)[-1]
+	for name in (leftMotif, rightMotif):
+		if name not in motifs:
+			parser.error(f"Summary motif {name} is not one of the scanned motifs: {', '.join(motifs)}")
+
+	print("\n\t--- SCANNING TELOMERIC REPEATS ---\n")
+	start = time.time()
+	results = scanAssemblies(args.input, motifs, threads = args.threads, endLength = args.endLength, whole = args.whole, minLength = args.minLength, leftMotif = leftMotif, rightMotif = rightMotif)
+	end = time.time()
+	print(f"{len(args.input)} assemblies scanned: ran in {round(end-start)}s")
+
+	with open(args.output + ".telomeres.bed", 'w') as bedFile, open(args.output + ".telomeres.tsv", 'w') as summaryFile:
+		summaryFile.write("assembly\tcontig\tlength\tleft_bp\tright_bp\ttelomeres\n")
+		for path in args.input:
+			assembly = os.path.basename(path)
+			hits, summary = results[path]
+			for name in hits:
+				for i in range(hits[name].nbIDs):
+					bedFile.writelines([f"{b.id}\t{b.start}\t{b.end}\t{name}\t{assembly}\n" for b in hits[name].coordinates[i]])
+			nbComplete = 0
+			for id, length, leftBp, rightBp in summary:
+				telomeres = {(True, True): "both", (True, False): "left", (False, True): "right", (False, False): "none"}[(leftBp > 0, rightBp > 0)]
+				nbComplete += telomeres == "both"
+				summaryFile.write(f"{assembly}\t{id}\t{length}\t{leftBp}\t{rightBp}\t{telomeres}\n")
+			print(f"\t{assembly}\t{nbComplete}/{len(summary)} contigs with telomeres at both ends")
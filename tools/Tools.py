@@ -12,15 +12,34 @@ It implements the classes:
 	- BEDcoordinates: One object correspond to a simple genomic coordinates, 
 					  with chromosome ID, start and end (0-based exclusive)
 	- BED: One object correspond to a list of BEDcoordinate objects. 
-		   The class contains methods to add or substract BED objects, 
-		   get the overlap length between different objects
+		   The class contains methods to add, substract, intersect or 
+		   complement BED objects (operators +, |, -, & and ~), 
+		   get the overlap length between different objects, and query the 
+		   coordinates overlapping positions with binary search
+	- Depth: One object correspond to the coverage depth of sequences by a 
+			 list of hits, stored as breakpoints
 	- Fasta: One object correspond to a fasta file, with multiple sequences
-			 designed by an identifier. 
+			 designed by an identifier. Files can be plain or gzip/BGZF 
+			 compressed. 
+	- IndexedFasta: Random access to the sequences of an indexed (and 
+					possibly BGZF compressed) fasta file. 
+BED objects can be read from and written to text BED files (readBED, 
+BED.toFile) or compact binary files (readBinaryBED, BED.toBinary). 
 '''
 # ---------------------------------------------------------------------------
 #from __future__ import annotations
 import time
 import re
+import os
+import sys
+import zlib
+import struct
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from itertools import groupby, accumulate
+from collections import Counter
+from bisect import bisect_left, bisect_right
 # ---------------------------------------------------------------------------
 
 def rank_simple(vector):
@@ -28,6 +47,110 @@ def rank_simple(vector):
 
 def decreasing_rank_simple(vector):
 	return sorted(range(len(vector)), key=vector.__getitem__)[::-1]
+
+def isCompressed(path):
+	# Return True if the file is gzip (or BGZF) compressed, from its magic number
+	with open(path, 'rb') as file:
+		return file.read(2) == b"\x1f\x8b"
+
+def _openText(path):
+	# Open a text file for reading, transparently decompressing gzip and 
+	# BGZF files
+	if isCompressed(path):
+		return gzip.open(path, 'rt')
+	return open(path, 'r')
+
+def _openFastaOutput(path, compress = None, threads = 1):
+	# Open a fasta file for writing, BGZF compressed if compress is True 
+	# (by default, if path ends with .gz)
+	if compress is None:
+		compress = path.endswith(".gz")
+	if compress:
+		return BgzfWriter(path, threads = threads)
+	return open(path, 'w')
+
+def _mergeIntervals(id:str, starts, ends):
+	# Sort the intervals of one sequence by start position and merge the 
+	# overlapping or adjacent ones in a single sweep. 
+	# Return the list of resulting BEDcoordinates
+	merged = []
+	curStart = None
+	for j in rank_simple(starts):
+		start = starts[j]
+		end = ends[j]
+		if start > end:
+			raise Exception("Wrong coordinates given for BEDcoordinates object. End must be larger than start. ")
+		if start == end:
+			continue
+		if curStart is None:
+			curStart, curEnd = start, end
+		elif start <= curEnd:
+			if end > curEnd:
+				curEnd = end
+		else:
+			merged += [BEDcoordinates(id, curStart, curEnd)]
+			curStart, curEnd = start, end
+	if curStart is not None:
+		merged += [BEDcoordinates(id, curStart, curEnd)]
+	return merged
+
+# Merge-join operations on two ordered lists of non overlapping BEDcoordinates
+# of the same sequence. They run in O(len(a) + len(b))
+def _substractSorted(a, b):
+	result = []
+	j = 0
+	for x in a:
+		start = x.start
+		end = x.end
+		# Skip intervals of b ending before x
+		while j < len(b) and b[j].end <= start:
+			j += 1
+		k = j
+		while k < len(b) and b[k].start < end:
+			if b[k].start > start:
+				result += [BEDcoordinates(x.id, start, b[k].start)]
+			start = max(start, b[k].end)
+			if start >= end:
+				break
+			k += 1
+		if start == x.start and end == x.end:
+			result += [x]
+		elif start < end:
+			result += [BEDcoordinates(x.id, start, end)]
+	return result
+
+def _intersectSorted(a, b):
+	result = []
+	i = 0
+	j = 0
+	while i < len(a) and j < len(b):
+		start = max(a[i].start, b[j].start)
+		end = min(a[i].end, b[j].end)
+		if start < end:
+			result += [BEDcoordinates(a[i].id, start, end)]
+		if a[i].end < b[j].end:
+			i += 1
+		else:
+			j += 1
+	return result
+
+def _unionSorted(a, b):
+	result = []
+	i = 0
+	j = 0
+	while i < len(a) or j < len(b):
+		if j == len(b) or (i < len(a) and a[i].start <= b[j].start):
+			x = a[i]
+			i += 1
+		else:
+			x = b[j]
+			j += 1
+		if len(result) > 0 and x.start <= result[-1].end:
+			if x.end > result[-1].end:
+				result[-1] = BEDcoordinates(x.id, result[-1].start, x.end)
+		else:
+			result += [x]
+	return result
 # ---------------------------------------------------------------------------
 # Class
 
@@ -35,7 +158,15 @@ def decreasing_rank_simple(vector):
 class BEDcoordinates: pass
 class BED: pass
 
+# Binary BED format: magic number, the path, size and modification time of 
+# the file the BED was computed from (if any), then a zlib compressed body 
+# holding the coordinates of the BED and of its genome (if any): the number 
+# of sequences then, for each sequence, the ID and the start and end positions 
+# as int64 arrays
+BINARY_BED_MAGIC = b"BEDB\x03"
+
 class BEDcoordinates:
+	__slots__ = ("void", "id", "start", "end")
 	def __init__(self, id:str, start:int, end:int):
 		# Class constructor with reel coordinates
 		if start < end:
@@ -151,6 +282,11 @@ class BEDcoordinates:
 
 
 class BED:
+	# The genome attribute is an optional BED of the whole sequences, used by 
+	# complement and the ~ operator. It is set by getNonNBED and getBED, and 
+	# kept by copy, getID, the -, +, |, & operators (substractBED, unionBED, 
+	# intersectBED), complement and binary files (toBinary, readBinaryBED). 
+	# BEDs built by the constructor, readBED or Depth.atLeast have no genome
 	def __init__(self, *args):
 		if len(args) == 0:
 			# Class constructor for void coordinates
@@ -158,10 +294,14 @@ class BED:
 			self.coordinates = []
 			self.len = 0
 			self.nbIDs = 0
+			self.genome = None
+			self.index = None
 		else:
 			# Class constructor for BED and BEDcoordinates arguments
 			self.IDs = []
 			self.coordinates = []
+			self.genome = None
+			self.index = None
 			coordinates2add = []
 			for arg in args:
 				if isinstance(arg, BEDcoordinates):
@@ -184,12 +324,15 @@ class BED:
 							raise Exception("Wrong type argument given. Only BED and BEDcoordinates arguments taken. ")
 				else:
 					raise Exception("Wrong type argument given. Only BED and BEDcoordinates arguments taken. ")
-				for b in coordinates2add:
-					if b.id in self.IDs:
-						self.coordinates[self.IDs.index(b.id)] += [b]
-					else:
-						self.IDs += [b.id]
-						self.coordinates += [[b]]
+			# Group coordinates by ID
+			indexes = {}
+			for b in coordinates2add:
+				if b.id in indexes:
+					self.coordinates[indexes[b.id]] += [b]
+				else:
+					indexes[b.id] = len(self.IDs)
+					self.IDs += [b.id]
+					self.coordinates += [[b]]
 			self.nbIDs = len(self.coordinates)
 			if self.nbIDs == 0:
 				self.IDs = []
@@ -205,25 +348,10 @@ class BED:
 		# This function check if there is an overlap between some coordinates
 		# and merge them if it is the case
 		for i in range(self.nbIDs):
-			minPos = min([b.start for b in self.coordinates[i]])
-			maxPos = max([b.end for b in self.coordinates[i]])
-			totalBEDcoordinates = [BEDcoordinates(id = self.IDs[i], start = minPos, end = maxPos)]
-			for b2substract in self.coordinates[i]:
-				newTotalBEDcoordinates = []
-				for b in totalBEDcoordinates:
-					newTotalBEDcoordinates += b.substractCoordinates(b2substract)
-				totalBEDcoordinates = newTotalBEDcoordinates.copy()
-			# invert the obtained BED
-			# Get all positions and order them
-			allPositions = [minPos, maxPos]
-			for b in totalBEDcoordinates:
-				allPositions += [b.start, b.end]
-			allPositions.sort()
-			# 
-			finalBEDcoordinates = []
-			for j in range(0, len(allPositions), 2):
-				finalBEDcoordinates += [BEDcoordinates(id = self.IDs[i], start = allPositions[j], end = allPositions[j+1])]
-			self.coordinates[i] = finalBEDcoordinates.copy()
+			starts = [b.start for b in self.coordinates[i]]
+			ends = [b.end for b in self.coordinates[i]]
+			self.coordinates[i] = _mergeIntervals(self.IDs[i], starts, ends)
+		self.index = None
 	def order(self):
 		# This function order the BED by id then by start position
 		# First order IDs
@@ -238,13 +366,16 @@ class BED:
 			subOrder = rank_simple(startPositions)
 			newCoordinates = [self.coordinates[i][j] for j in subOrder]
 			self.coordinates[i] = newCoordinates.copy()
+		self.index = None
 	def __len__(self):
 		lengths = []
 		for i in range(self.nbIDs):
 			lengths += [b.end-b.start for b in self.coordinates[i]]
 		return sum(lengths)
 	def copy(self):
-		return BED(self)
+		newBED = BED()._setCoordinates(self.IDs, [list(x) for x in self.coordinates])
+		newBED.genome = self.genome
+		return newBED
 	def __str__(self):
 		if self.nbIDs == 0:
 			return "Void"
@@ -256,9 +387,14 @@ class BED:
 			return toPrint[0:-1]
 	def __add__(self, B):
 		if isinstance(B, BED):
-			return BED(self, B)
+			return self.unionBED(B)
 		else: 
 			raise Exception("Wrong type argument given. Add operator only takes BED objects. ")
+	def __or__(self, B):
+		if isinstance(B, BED):
+			return self.unionBED(B)
+		else: 
+			raise Exception("Wrong type argument given. Or operator only takes BED objects. ")
 	def __sub__(self, B):
 		if isinstance(B, BED):
 			newBED = self.copy()
@@ -266,12 +402,69 @@ class BED:
 			return newBED
 		else: 
 			raise Exception("Wrong type argument given. Sub operator only takes BED objects. ")
+	def __and__(self, B):
+		if isinstance(B, BED):
+			return self.intersectBED(B)
+		else: 
+			raise Exception("Wrong type argument given. And operator only takes BED objects. ")
+	def __invert__(self):
+		return self.complement()
 	def getID(self, id:str):
 		# return a BED of all coordinates with id
 		if id in self.IDs:
-			return BED(self.coordinates[self.IDs.index(id)])
+			newBED = BED()._setCoordinates([id], [list(self.coordinates[self.IDs.index(id)])])
 		else:
-			return BED()
+			newBED = BED()
+		if self.genome is not None:
+			newBED.genome = self.genome.getID(id)
+		return newBED
+	def buildIndex(self):
+		# Index the start and end positions of each ID for binary search. 
+		# As coordinates are ordered and without overlap, both starts and 
+		# ends are sorted. The index is built on demand by the query methods 
+		# and reset when the BED is modified. IDs without coordinates are skipped
+		self.index = {}
+		for i in range(self.nbIDs):
+			if len(self.coordinates[i]) == 0:
+				continue
+			starts = [b.start for b in self.coordinates[i]]
+			ends = [b.end for b in self.coordinates[i]]
+			self.index[self.IDs[i]] = (starts, ends, self.coordinates[i])
+	def query(self, id:str, start:int, end:int):
+		# Return the list of coordinates overlapping [start, end) in O(log n + k)
+		if self.index is None:
+			self.buildIndex()
+		if id not in self.index:
+			return []
+		starts, ends, coordinates = self.index[id]
+		return coordinates[bisect_right(ends, start):bisect_left(starts, end)]
+	def queryPoint(self, id:str, position:int):
+		# Return the list of coordinates containing a position (0 or 1 element)
+		return self.query(id, position, position+1)
+	def queryAll(self, hits):
+		# Bulk query: return, for each BEDcoordinates of hits, the list of 
+		# coordinates of this BED overlapping it
+		if self.index is None:
+			self.buildIndex()
+		return [[] if b.void else self.query(b.id, b.start, b.end) for b in hits]
+	def nearest(self, id:str, position:int):
+		# Return the coordinates closest to a position (the one containing it 
+		# if any, the leftmost one in case of tie), or None if id is absent
+		if self.index is None:
+			self.buildIndex()
+		if id not in self.index:
+			return None
+		starts, ends, coordinates = self.index[id]
+		j = bisect_right(ends, position)
+		if j < len(coordinates) and starts[j] <= position:
+			return coordinates[j]
+		if j == 0:
+			return coordinates[0]
+		if j == len(coordinates):
+			return coordinates[-1]
+		if position - ends[j-1] + 1 <= starts[j] - position:
+			return coordinates[j-1]
+		return coordinates[j]
 	def addCoordinates(self, b:BEDcoordinates):
 		if b.void:
 			pass
@@ -293,7 +486,9 @@ class BED:
 						overlappedCoordinates += [self.coordinates[i][j]]
 						coordinates2del += [j]
 				if not overlap:
-					self.coordinates[i] +=  [b]
+					# Insert b at its position to keep coordinates ordered
+					j = bisect_right([x.start for x in self.coordinates[i]], b.start)
+					self.coordinates[i].insert(j, b)
 				else:
 					newCoordinates = self.coordinates[i].copy()
 					# Remove Overlapped coordinates from BED
@@ -307,6 +502,7 @@ class BED:
 					self.order()
 		self.nbIDs = len(self.coordinates)
 		self.len = len(self)
+		self.index = None
 	def checkOverlap(self):
 		# This function check if there is an overlap between coordinates and return True of False
 		for i in range(self.nbIDs):
@@ -330,21 +526,57 @@ class BED:
 					newCoordinates += b1.substractCoordinates(b2)
 				self.coordinates[indexId] = newCoordinates
 				self.len = len(self)
+				self.index = None
 	def substractBED(self, B:BED):
 		if B.nbIDs == 0:
 			pass
 		else:
-			# Remove each coordinates of BED to this BED object
-			for i in range(len(B.IDs)):
-				for b in B.coordinates[i]:
-					self.substractCoordinates(b)
+			# Remove the coordinates of B from each sequence with a merge-join
+			indexesB = {id: i for i, id in enumerate(B.IDs)}
+			for i in range(self.nbIDs):
+				if self.IDs[i] in indexesB:
+					self.coordinates[i] = _substractSorted(self.coordinates[i], B.coordinates[indexesB[self.IDs[i]]])
+			self._setCoordinates(self.IDs, self.coordinates)
+	def intersectBED(self, B:BED):
+		# Return a new BED with the positions found in both BED objects
+		indexesB = {id: i for i, id in enumerate(B.IDs)}
+		IDs = []
+		coordinates = []
+		for i in range(self.nbIDs):
+			if self.IDs[i] in indexesB:
+				IDs += [self.IDs[i]]
+				coordinates += [_intersectSorted(self.coordinates[i], B.coordinates[indexesB[self.IDs[i]]])]
+		newBED = BED()._setCoordinates(IDs, coordinates)
+		newBED.genome = self.genome
+		return newBED
+	def unionBED(self, B:BED):
+		# Return a new BED with the positions found in any of the BED objects
+		indexesB = {id: i for i, id in enumerate(B.IDs)}
+		IDs = list(self.IDs)
+		coordinates = []
+		for i in range(self.nbIDs):
+			if self.IDs[i] in indexesB:
+				coordinates += [_unionSorted(self.coordinates[i], B.coordinates[indexesB.pop(self.IDs[i])])]
+			else:
+				coordinates += [list(self.coordinates[i])]
+		for id, i in indexesB.items():
+			IDs += [id]
+			coordinates += [list(B.coordinates[i])]
+		newBED = BED()._setCoordinates(IDs, coordinates)
+		newBED.genome = self.genome if self.genome is not None else B.genome
+		return newBED
+	def complement(self, genome:BED = None):
+		# Return the positions of genome (by default the genome attribute 
+		# of the BED) not covered by this BED
+		if genome is None:
+			genome = self.genome
+		if genome is None:
+			raise Exception("Cannot compute complement of a BED without genome coordinates.")
+		newBED = genome - self
+		newBED.genome = genome
+		return newBED
 	def overlapLen(self, B:BED, percent = False):
-		overlap = 0
-		for id in B.IDs:
-			if id in self.IDs:
-				for b1 in self.coordinates[self.IDs.index(id)]:
-					for b2 in B.coordinates[B.IDs.index(id)]:
-						overlap += b1.overlapLen(b2)
+		overlap = len(self.intersectBED(B))
 		if percent :
 			if self.len == 0:
 				raise Exception("Cannot compute overlap length percent on a BED with length 0.")
@@ -362,6 +594,173 @@ class BED:
 			for b in self.coordinates[0]: # For all coordinates of the first (and only) sequence in BED object
 				meanSum += (( b.start + b.end - 1 ) / 2 ) * ( b.end - b.start )
 			return meanSum / self.len
+	def _setCoordinates(self, IDs, coordinates):
+		# Replace the content of the BED by the given coordinates. 
+		# Each list of coordinates must already be ordered and without overlap, 
+		# which avoids the quadratic removeOverlap and order steps
+		kept = [i for i in range(len(IDs)) if len(coordinates[i]) > 0]
+		indices = sorted(kept, key = lambda i: str(IDs[i]))
+		self.IDs = [IDs[i] for i in indices]
+		self.coordinates = [coordinates[i] for i in indices]
+		self.nbIDs = len(self.IDs)
+		self.len = len(self)
+		self.index = None
+		return self
+	def toFile(self, path, oneBased = False):
+		# Write the BED to a tab separated text file (id, start, end). 
+		# If oneBased is True, the coordinates are 1-based (as in getBED and 
+		# blast hits) and are converted to 0-based on output
+		shift = 1 if oneBased else 0
+		with open(path, 'w') as output:
+			for i in range(self.nbIDs):
+				id = self.IDs[i]
+				output.writelines([f"{id}\t{b.start - shift}\t{b.end - shift}\n" for b in self.coordinates[i]])
+	def toBinary(self, path, source = None):
+		# Write the BED to a compact binary file, that can be loaded back 
+		# with readBinaryBED much faster than a text BED. 
+		# source is the path of the file the BED was computed from, whose 
+		# path, size and modification time are stored to validate caches
+		if source is None:
+			sourceInfo = ("", 0, 0.0)
+		else:
+			sourceInfo = (os.path.abspath(source), os.path.getsize(source), os.path.getmtime(source))
+		body = _packCoordinates(self)
+		if self.genome is None:
+			body += [struct.pack("<B", 0)]
+		else:
+			body += [struct.pack("<B", 1)] + _packCoordinates(self.genome)
+		# Write to a temporary file first, so that an interrupted job never 
+		# leaves a half-written file at path
+		tmpPath = f"{path}.{os.getpid()}.tmp"
+		with open(tmpPath, 'wb') as output:
+			output.write(BINARY_BED_MAGIC)
+			sourcePath = sourceInfo[0].encode()
+			output.write(struct.pack("<I", len(sourcePath)) + sourcePath + struct.pack("<Qd", sourceInfo[1], sourceInfo[2]))
+			output.write(zlib.compress(b"".join(body), 1))
+		os.replace(tmpPath, path)
+
+class Depth:
+	"""
+	This class implement objects storing the coverage depth along sequences, 
+	computed from hits (BEDcoordinates that may overlap, or BED objects that 
+	each count once). For each ID, depth is stored as ordered breakpoints 
+	and the depth from each breakpoint to the next one, so the memory is 
+	proportional to the number of hits and not to the sequence lengths. 
+	"""
+	def __init__(self, hits = None):
+		# Gather start and end positions of all hits by ID
+		starts = {}
+		ends = {}
+		for x in ([] if hits is None else hits):
+			if isinstance(x, BEDcoordinates):
+				coordinates = [x]
+			elif isinstance(x, BED):
+				coordinates = [b for i in range(x.nbIDs) for b in x.coordinates[i]]
+			else:
+				raise Exception("Wrong type argument given. Only lists of BED and BEDcoordinates objects taken. ")
+			for b in coordinates:
+				if not b.void:
+					if b.id not in starts:
+						starts[b.id] = []
+						ends[b.id] = []
+					starts[b.id] += [b.start]
+					ends[b.id] += [b.end]
+		# Difference array over the sorted breakpoints, then cumulative sum
+		self.IDs = sorted(starts, key = str)
+		self.breakpoints = []
+		self.depths = []
+		for id in self.IDs:
+			opened = Counter(starts[id])
+			closed = Counter(ends[id])
+			positions = sorted(opened.keys() | closed.keys())
+			self.breakpoints += [positions]
+			self.depths += [list(accumulate([opened[p] - closed[p] for p in positions]))]
+
+	def __str__(self):
+		return "\n".join(self.toLines())
+
+	def toLines(self):
+		"Return the depth as bedGraph lines (id, start, end, depth), without depth 0 segments. "
+		lines = []
+		for i in range(len(self.IDs)):
+			positions = self.breakpoints[i]
+			depths = self.depths[i]
+			lines += [f"{self.IDs[i]}\t{positions[j]}\t{positions[j+1]}\t{depths[j]}" for j in range(len(positions)-1) if depths[j] > 0]
+		return lines
+
+	def toFile(self, path):
+		"Write the depth to a bedGraph file. "
+		with open(path, 'w') as output:
+			output.writelines([line + "\n" for line in self.toLines()])
+
+	def getDepth(self, id, position):
+		"Return the depth at a given position. "
+		if id not in self.IDs:
+			return 0
+		i = self.IDs.index(id)
+		j = bisect_right(self.breakpoints[i], position) - 1
+		return self.depths[i][j] if j >= 0 else 0
+
+	def atLeast(self, k):
+		"Return a BED of all positions covered at least k times. "
+		coordinates = []
+		for i in range(len(self.IDs)):
+			id = self.IDs[i]
+			positions = self.breakpoints[i]
+			depths = self.depths[i]
+			coordinates += [[]]
+			start = None
+			for j in range(len(positions)):
+				if depths[j] >= k and start is None:
+					start = positions[j]
+				elif depths[j] < k and start is not None:
+					coordinates[-1] += [BEDcoordinates(id, start, positions[j])]
+					start = None
+		return BED()._setCoordinates(self.IDs, coordinates)
+
+	def histogram(self, genome:BED = None):
+		"""
+		Return a dictionary with the number of bases covered at each depth. 
+		Without genome, only covered bases are counted. With a genome BED, 
+		counts are restricted to the genome and depth 0 bases are included. 
+		"""
+		histogram = {}
+		genomeIndexes = {} if genome is None else {id: i for i, id in enumerate(genome.IDs)}
+		for i in range(len(self.IDs)):
+			positions = self.breakpoints[i]
+			depths = self.depths[i]
+			if genome is None:
+				for j in range(len(positions)-1):
+					if depths[j] > 0:
+						histogram[depths[j]] = histogram.get(depths[j], 0) + positions[j+1] - positions[j]
+			elif self.IDs[i] in genomeIndexes:
+				# Merge-join the depth segments with the genome coordinates
+				coordinates = genome.coordinates[genomeIndexes[self.IDs[i]]]
+				j = 0
+				k = 0
+				while j < len(positions)-1 and k < len(coordinates):
+					start = max(positions[j], coordinates[k].start)
+					end = min(positions[j+1], coordinates[k].end)
+					if start < end and depths[j] > 0:
+						histogram[depths[j]] = histogram.get(depths[j], 0) + end - start
+					if positions[j+1] < coordinates[k].end:
+						j += 1
+					else:
+						k += 1
+		if genome is not None:
+			uncovered = len(genome) - sum(histogram.values())
+			if uncovered > 0:
+				histogram[0] = uncovered
+		return dict(sorted(histogram.items()))
+
+# Default base classes counted by window profiles
+WINDOW_CLASSES = {"GC": "GCSgcs", "N": "Nn", "softmasked": "acgtnrykmswbdhv"}
+
+def _prefixCounts(buffer, positions):
+	# Return the number of 1 bytes of buffer before each of the sorted positions, 
+	# as a prefix sum sampled at these positions
+	counts = [buffer.count(1, start, end) for start, end in zip([0] + positions[:-1], positions)]
+	return list(accumulate(counts))
 
 class Sequence:
 	"""
@@ -386,6 +785,50 @@ class Sequence:
 			seq_to_print = seq_to_print[:-1]
 		return self.description + seq_to_print
 
+	def write(self, output):
+		"Write the sequence to an open file, with lines of 80 characters. "
+		output.write(self.description)
+		output.writelines([self.seq[i:i+80] + '\n' for i in range(0, len(self.seq), 80)])
+
+	def windowProfile(self, window, step = None, classes = None):
+		"""
+		Return the number of bases of each class in windows along the sequence, 
+		as a list of [start, end, count1, count2, ...] (0-based, end excluded). 
+		Windows start every step bases (default: window size), and the last 
+		window is truncated at the end of the sequence. classes is a dictionary 
+		{name: bases}, by default WINDOW_CLASSES (GC, N and soft-masked bases). 
+		Counts are computed with prefix sums over a byte mask of each class. 
+		"""
+		if classes is None:
+			classes = WINDOW_CLASSES
+		if step is None:
+			step = window
+		if window <= 0 or step <= 0:
+			raise Exception("Window and step sizes must be positive.")
+		length = len(self.seq)
+		# Window coordinates, stopping at the first window reaching the end
+		starts = []
+		ends = []
+		for start in range(0, length, step):
+			starts += [start]
+			ends += [min(start + window, length)]
+			if ends[-1] == length:
+				break
+		if len(starts) == 0:
+			return []
+		positions = sorted(set(starts) | set(ends))
+		rank = {x: j for j, x in enumerate(positions)}
+		buffer = self.seq.encode()
+		profile = [[starts[j], ends[j]] for j in range(len(starts))]
+		for bases in classes.values():
+			table = bytearray(256)
+			for base in bases.encode():
+				table[base] = 1
+			prefix = _prefixCounts(buffer.translate(table), positions)
+			for j in range(len(starts)):
+				profile[j] += [prefix[rank[ends[j]]] - prefix[rank[starts[j]]]]
+		return profile
+
 	def reverseComplement(self):
 		complement = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A', 'N':'N', 'S':'S', 'W':'W', 'Y':'R', 'R':'Y', 'M':'K', 'K':'M', 'B':'V', 'D':'H', 'H':'D', 'V':'B', 'a': 't', 'c': 'g', 'g': 'c', 't': 'a', 'n':'n', 's':'s', 'w':'w', 'y':'r', 'r':'y', 'm':'k', 'k':'m', 'b':'v', 'd':'h', 'h':'d', 'v':'b'}
 		self.seq = ''.join([complement[base] for base in self.seq[::-1]])
@@ -400,20 +843,20 @@ class Fasta:
 			# create a void Fasta
 			self.sequences = []
 		elif isinstance(input, str):
-			# If input is the path to a fasta file
+			# If input is the path to a fasta file (plain or gzip/BGZF compressed)
 			self.sequences = [] # List of Sequence objects
 			# Read fasta file
-			with open(input, 'r') as fasta:
-				seq = ""
+			with _openText(input) as fasta:
+				seq = []
 				for line in fasta:
 					if line.startswith(">"):
-						if seq != "":
-							self.sequences += [Sequence(header, seq)]
-							seq=""
+						if len(seq) > 0:
+							self.sequences += [Sequence(header, "".join(seq))]
+							seq = []
 						header = line
 					else:
-						seq += line.strip()
-				self.sequences += [Sequence(header, seq)] # Add last sequence of the file
+						seq += [line.strip()]
+				self.sequences += [Sequence(header, "".join(seq))] # Add last sequence of the file
 		elif all((isinstance(x, Sequence) for x in input)):
 			# If input is a list of Sequence objects
 			self.sequences = input
@@ -454,61 +897,273 @@ class Fasta:
 		"Return the index of an ID in the object. "
 		return self.getID().index(ID)
 	
-	def toFile(self, path):
-		"Write fasta to a file"
+	def toFile(self, path, compress = None, threads = 1, index = False):
+		"""
+		Write fasta to a file. If compress is True (by default, if path ends 
+		with .gz), the file is BGZF compressed on the given number of threads. 
+		If index is True, the samtools index files path.fai (and path.gzi if 
+		compressed) are also written, for random access with IndexedFasta. 
+		"""
+		output = _openFastaOutput(path, compress, threads)
+		faiLines = []
+		offset = 0
+		with output:
+			for x in self.sequences:
+				x.write(output)
+				offset += len(x.description.encode())
+				faiLines += [f"{x.id}\t{len(x)}\t{offset}\t80\t81\n"]
+				offset += len(x) + (len(x) + 79) // 80
+		if index:
+			with open(path + ".fai", 'w') as fai:
+				fai.writelines(faiLines)
+			if isinstance(output, BgzfWriter):
+				output.writeIndex(path + ".gzi")
+
+	def windowProfile(self, window, step = None, classes = None):
+		"Return the window profiles of all sequences, as a list of [id, start, end, count1, count2, ...]. "
+		return [[x.id] + row for x in self.sequences for row in x.windowProfile(window, step, classes)]
+
+	def windowProfileToFile(self, path, window, step = None, classes = None, fractions = False):
+		"""
+		Write the window profiles of all sequences to a BED-style table, with a 
+		header line. If fractions is True, counts are divided by window lengths. 
+		"""
+		if classes is None:
+			classes = WINDOW_CLASSES
 		with open(path, 'w') as output:
-			output.write(self.__str__() + '\n')
+			output.write("#id\tstart\tend\t" + "\t".join(classes) + "\n")
+			for row in self.windowProfile(window, step, classes):
+				if fractions:
+					values = [str(round(x / (row[2] - row[1]), 4)) for x in row[3:]]
+				else:
+					values = [str(x) for x in row[3:]]
+				output.write(f"{row[0]}\t{row[1]}\t{row[2]}\t" + "\t".join(values) + "\n")
+
+	def partition(self, outputs, default = None, compress = None, threads = 1):
+		"""
+		Write the sequences to several fasta files in one pass. outputs is a 
+		dictionary {path: selector}, where selector is either a collection of 
+		IDs or a function taking a Sequence and returning a boolean. Each 
+		sequence is written to the first file whose selector matches, or to 
+		the default file if given. All files are created, even if empty, and 
+		must be distinct. As in toFile, files are BGZF compressed if compress 
+		is True (by default, if their path ends with .gz). 
+		Return a dictionary with the number of sequences written to each file. 
+		"""
+		paths = list(outputs) + ([default] if default is not None else [])
+		if len(set([os.path.abspath(path) for path in paths])) < len(paths):
+			raise Exception("Output files of a partition must be distinct (including the default file).")
+		selectors = []
+		for path, selector in outputs.items():
+			if callable(selector):
+				selectors += [(path, selector)]
+			else:
+				selectors += [(path, lambda x, IDs = set(selector): x.id in IDs)]
+		counts = {path: 0 for path in paths}
+		files = {}
+		try:
+			for path in paths:
+				files[path] = _openFastaOutput(path, compress, threads)
+			for x in self.sequences:
+				for path, selector in selectors:
+					if selector(x):
+						break
+				else:
+					path = default
+				if path is not None:
+					x.write(files[path])
+					counts[path] += 1
+		finally:
+			for output in files.values():
+				output.close()
+		return counts
+
+
+
+
+# BGZF compressed files are series of gzip blocks of at most 64 kb, 
+# ending with an empty block
+BGZF_BLOCK_SIZE = 0xff00
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+def _compressBgzfBlock(data):
+	# Return one BGZF block containing data
+	compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+	deflated = compressor.compress(data) + compressor.flush()
+	header = struct.pack("<BBBBIBBHBBHH", 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, len(deflated) + 25)
+	return header + deflated + struct.pack("<II", zlib.crc32(data), len(data))
+
+class BgzfWriter:
+	"""
+	This class implement a text file writer producing BGZF compressed files, 
+	readable by gzip and indexable by samtools. Blocks are compressed in 
+	parallel on a pool of threads (zlib releases the GIL). 
+	"""
+	def __init__(self, path, threads = 1):
+		self.output = open(path, 'wb')
+		self.buffer = []
+		self.bufferSize = 0
+		self.threads = max(1, threads)
+		self.pool = ThreadPoolExecutor(self.threads) if self.threads > 1 else None
+		self.pending = []
+		# Compressed and uncompressed offsets of each block, for the gzi index
+		self.blocks = []
+		self.compressedOffset = 0
+		self.uncompressedOffset = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def write(self, text):
+		data = text.encode()
+		self.buffer += [data]
+		self.bufferSize += len(data)
+		if self.bufferSize >= BGZF_BLOCK_SIZE:
+			self._flushBuffer(final = False)
+
+	def writelines(self, lines):
+		for line in lines:
+			self.write(line)
+
+	def _flushBuffer(self, final):
+		data = b"".join(self.buffer)
+		cut = len(data) if final else len(data) - len(data) % BGZF_BLOCK_SIZE
+		for i in range(0, cut, BGZF_BLOCK_SIZE):
+			block = data[i:i+BGZF_BLOCK_SIZE]
+			if self.pool is None:
+				self._writeBlock(_compressBgzfBlock(block), len(block))
+			else:
+				self.pending += [(self.pool.submit(_compressBgzfBlock, block), len(block))]
+		self.buffer = [data[cut:]]
+		self.bufferSize = len(data) - cut
+		# Write compressed blocks in order, keeping a bounded number in memory
+		while len(self.pending) > (0 if final else 4 * self.threads):
+			future, size = self.pending.pop(0)
+			self._writeBlock(future.result(), size)
+
+	def _writeBlock(self, block, size):
+		self.blocks += [(self.compressedOffset, self.uncompressedOffset)]
+		self.output.write(block)
+		self.compressedOffset += len(block)
+		self.uncompressedOffset += size
+
+	def close(self):
+		if self.output.closed:
+			return
+		self._flushBuffer(final = True)
+		if self.pool is not None:
+			self.pool.shutdown()
+		self.output.write(BGZF_EOF)
+		self.output.close()
+
+	def writeIndex(self, path):
+		"Write the samtools gzi index (offsets of all blocks but the first one). "
+		with open(path, 'wb') as gzi:
+			gzi.write(struct.pack("<Q", len(self.blocks[1:])))
+			for compressedOffset, uncompressedOffset in self.blocks[1:]:
+				gzi.write(struct.pack("<QQ", compressedOffset, uncompressedOffset))
+
 
+class IndexedFasta:
+	"""
+	This class implement random access to the sequences of an indexed fasta 
+	file, plain or BGZF compressed, without reading the whole file. It uses 
+	the samtools index files path.fai and path.gzi (for compressed files). 
+	"""
+	def __init__(self, path):
+		self.path = path
+		self.index = {}
+		self.IDs = []
+		with open(path + ".fai", 'r') as fai:
+			for line in fai:
+				id, length, offset, lineBases, lineWidth = line.split("\t")[0:5]
+				self.IDs += [id]
+				self.index[id] = (int(length), int(offset), int(lineBases), int(lineWidth))
+		self.compressed = isCompressed(path)
+		self.blocks = [(0, 0)]
+		if self.compressed:
+			with open(path + ".gzi", 'rb') as gzi:
+				n = struct.unpack("<Q", gzi.read(8))[0]
+				values = struct.unpack(f"<{2*n}Q", gzi.read(16*n))
+				self.blocks += list(zip(values[0::2], values[1::2]))
+		self.uncompressedOffsets = [x[1] for x in self.blocks]
+
+	def __len__(self):
+		"Return the number of sequences in the file. "
+		return len(self.IDs)
+
+	def getID(self):
+		"Return the list of all the ID in the file. "
+		return list(self.IDs)
 
+	def getLengths(self):
+		"Return a list containing the length of each sequence. "
+		return [self.index[id][0] for id in self.IDs]
+
+	def _read(self, offset, size):
+		# Read size bytes from the uncompressed offset
+		with open(self.path, 'rb') as file:
+			if not self.compressed:
+				file.seek(offset)
+				return file.read(size)
+			# Decompress blocks from the one containing offset
+			i = bisect_right(self.uncompressedOffsets, offset) - 1
+			file.seek(self.blocks[i][0])
+			skip = offset - self.blocks[i][1]
+			data = []
+			dataSize = 0
+			while dataSize < skip + size:
+				header = file.read(18)
+				if len(header) < 18:
+					break
+				blockSize = struct.unpack("<H", header[16:18])[0] + 1
+				block = zlib.decompress(file.read(blockSize - 18)[:-8], -15)
+				data += [block]
+				dataSize += len(block)
+			return b"".join(data)[skip:skip+size]
+
+	def getSeqFromID(self, ID, start = 0, end = None):
+		"Return the sequence (or the part [start, end), 0-based) corresponding to a specific ID. "
+		length, offset, lineBases, lineWidth = self.index[ID]
+		end = length if end is None else min(end, length)
+		if start >= end:
+			return ""
+		startOffset = offset + (start // lineBases) * lineWidth + start % lineBases
+		endOffset = offset + ((end - 1) // lineBases) * lineWidth + (end - 1) % lineBases + 1
+		return self._read(startOffset, endOffset - startOffset).decode().replace("\n", "").replace("\r", "")
 
 
 # ---------------------------------------------------------------------------
 # Definitions
 def getNonNBED(seqName:str, seq:str):
-	indices = [index for index, element in enumerate(seq) if (element == "n" or element == "N")]
-	# Get BED positions of Ns:
-	coordinates = []
-	for i in range(len(indices)):
-		if i == 0: # If first N
-			if indices[i+1] == indices[i]+1:
-				coordinates += [indices[i]] # Add starting coordinates
-			else: # First N in the sequence is a single N
-				coordinates += [indices[i]] # Add starting coordinate
-				coordinates += [indices[i]+1] # Add ending coordinate
-		elif i == len(indices)-1: # if last N
-			if indices[i-1] == indices[i]-1:
-				coordinates += [indices[i]+1] # Add ending coordinate
-			else : # Last N in the sequence is a single N
-				coordinates += [indices[i]] # Add starting coordinate
-				coordinates += [indices[i]+1] # Add ending coordinate
-		else:
-			cond1 = (indices[i-1] == indices[i]-1)
-			cond2 = (indices[i+1] == indices[i]+1)
-			if not cond1 and not cond2: # Case of a single n in the sequence
-				coordinates += [indices[i]] # Add starting coordinate
-				coordinates += [indices[i]+1] # Add ending coordinate
-			elif (cond1 ^ cond2): # XOR operator
-				if indices[i-1] == indices[i]-1:
-					coordinates += [indices[i]+1] # Add ending coordinate
-				else :
-					coordinates += [indices[i]] # Add starting coordinate
-	N_BED = BED()
-	for i in range(0, len(coordinates), 2):
-		startPos = coordinates[i] + 1
-		endPos = coordinates[i+1] + 1
-		N_BED.addCoordinates(BEDcoordinates(id = seqName, start = startPos, end = endPos))
+	# Get BED positions of Ns (1-based, end excluded)
+	N_BED = BED()._setCoordinates([seqName], [[BEDcoordinates(id = seqName, start = m.start() + 1, end = m.end() + 1) for m in re.finditer("[Nn]+", seq)]])
 	# Invert Bed Coordinates
-	# First create BED with all position
-	NonN_BED = BED(BEDcoordinates(id = seqName, start = 1, end = len(seq)+1))
-	NonN_BED.substractBED(N_BED) # Substract N Positions
-	return NonN_BED
+	# The genome is the BED with all positions of the sequence
+	genome = BED(BEDcoordinates(id = seqName, start = 1, end = len(seq)+1))
+	return N_BED.complement(genome)
 
-def getBED(fastaPath):
+def getBED(fastaPath, cachePath = None):
+	# If a binary cache computed from this same fasta exists, load it directly. 
+	# A cache computed from another fasta, or damaged, is rebuilt, but any 
+	# other existing file is never overwritten
+	if cachePath is not None and os.path.isfile(cachePath) and os.path.getsize(cachePath) > 0:
+		if not isBinaryBED(cachePath):
+			raise Exception(f"Cache file {cachePath} exists and is not a binary BED file, it will not be overwritten.")
+		sourceInfo = (os.path.abspath(fastaPath), os.path.getsize(fastaPath), os.path.getmtime(fastaPath))
+		try:
+			if readBinaryBEDSource(cachePath) == sourceInfo:
+				return readBinaryBED(cachePath)
+		except (struct.error, zlib.error, ValueError, UnicodeDecodeError):
+			print(f"Damaged cache file {cachePath}: rebuilding it")
 	# Get reference chromosome name and length
 	Chr=[]
 	Seq=[]
 	seq=""
-	fasta=open(fastaPath, 'r')
+	fasta=_openText(fastaPath)
 	for line in fasta:
 		if line.startswith(">"):
 			Chr += [line.strip().split(">")[1].split(" ")[0].split("\t")[0]]
@@ -528,8 +1183,108 @@ def getBED(fastaPath):
 		BED2Add += [getNonNBED(Chr[i], Seq[i])]
 	# Merging all BEDs into One
 	fastaBED = BED(BED2Add)
+	fastaBED.genome = BED([b.genome for b in BED2Add])
+	if cachePath is not None:
+		fastaBED.toBinary(cachePath, source = fastaPath)
 	return fastaBED
 
+def readBED(path, chunkSize = 1 << 22, oneBased = False):
+	# Read a BED file (only the 3 first columns are used) and return a BED object. 
+	# The file is parsed by chunks of lines into column lists, then the 
+	# coordinates are grouped by sequence and merged once at the end. 
+	# If oneBased is True, coordinates are converted to 1-based (as in getBED)
+	shift = 1 if oneBased else 0
+	IDs = []
+	starts = []
+	ends = []
+	with open(path, 'r') as bedFile:
+		while True:
+			lines = bedFile.readlines(chunkSize)
+			if not lines:
+				break
+			rows = [line.split(None, 3) for line in lines if not line.startswith(("#", "track", "browser"))]
+			rows = [row for row in rows if len(row) >= 3]
+			IDs += [row[0] for row in rows]
+			starts += [int(row[1]) + shift for row in rows]
+			ends += [int(row[2]) + shift for row in rows]
+	# Group coordinates by sequence
+	groupedIDs = []
+	coordinates = []
+	for id, group in groupby(rank_simple(IDs), key = IDs.__getitem__):
+		group = list(group)
+		groupedIDs += [id]
+		coordinates += [_mergeIntervals(id, [starts[j] for j in group], [ends[j] for j in group])]
+	return BED()._setCoordinates(groupedIDs, coordinates)
+
+def _packCoordinates(bed:BED):
+	# Return the binary representation of the coordinates of a BED, as a list of bytes
+	packed = [struct.pack("<Q", bed.nbIDs)]
+	for i in range(bed.nbIDs):
+		id = bed.IDs[i].encode()
+		starts = array('q', [b.start for b in bed.coordinates[i]])
+		ends = array('q', [b.end for b in bed.coordinates[i]])
+		if sys.byteorder == "big":
+			starts.byteswap()
+			ends.byteswap()
+		packed += [struct.pack("<IQ", len(id), len(starts)), id, starts.tobytes(), ends.tobytes()]
+	return packed
+
+def _unpackCoordinates(body, offset):
+	# Read coordinates packed by _packCoordinates from offset. 
+	# Return the BED and the offset following the coordinates
+	IDs = []
+	coordinates = []
+	nbIDs = struct.unpack_from("<Q", body, offset)[0]
+	offset += 8
+	for i in range(nbIDs):
+		idLen, n = struct.unpack_from("<IQ", body, offset)
+		offset += struct.calcsize("<IQ")
+		id = body[offset:offset+idLen].decode()
+		offset += idLen
+		starts = array('q', body[offset:offset+8*n])
+		offset += 8*n
+		ends = array('q', body[offset:offset+8*n])
+		offset += 8*n
+		if sys.byteorder == "big":
+			starts.byteswap()
+			ends.byteswap()
+		IDs += [id]
+		coordinates += [[BEDcoordinates(id, start, end) for start, end in zip(starts, ends)]]
+	return BED()._setCoordinates(IDs, coordinates), offset
+
+def _readBinaryBEDHeader(binFile):
+	# Read the magic number and source information of an open binary BED file. 
+	# Return (source path, size, modification time), or None if the file is 
+	# not a binary BED file of the current format
+	if binFile.read(len(BINARY_BED_MAGIC)) != BINARY_BED_MAGIC:
+		return None
+	sourceLen = struct.unpack("<I", binFile.read(4))[0]
+	sourcePath = binFile.read(sourceLen).decode()
+	size, mtime = struct.unpack("<Qd", binFile.read(struct.calcsize("<Qd")))
+	return (sourcePath, size, mtime)
+
+def isBinaryBED(path):
+	# Return True if the file starts with the magic number of binary BED files
+	with open(path, 'rb') as binFile:
+		return binFile.read(len(BINARY_BED_MAGIC)) == BINARY_BED_MAGIC
+
+def readBinaryBEDSource(path):
+	# Return the (path, size, modification time) of the file a binary BED was 
+	# computed from, or None if path is not a binary BED file
+	with open(path, 'rb') as binFile:
+		return _readBinaryBEDHeader(binFile)
+
+def readBinaryBED(path):
+	# Read a binary BED file written by BED.toBinary and return a BED object
+	with open(path, 'rb') as binFile:
+		if _readBinaryBEDHeader(binFile) is None:
+			raise Exception(f"{path} is not a binary BED file.")
+		body = zlib.decompress(binFile.read())
+	newBED, offset = _unpackCoordinates(body, 0)
+	if struct.unpack_from("<B", body, offset)[0] == 1:
+		newBED.genome = _unpackCoordinates(body, offset + 1)[0]
+	return newBED
+
 
 
 # ---------------------------------------------------------------------------
@@ -583,6 +1338,22 @@ if __name__ == "__main__":
 	print(c)
 	print("Center C")
 	print(c.getCenter())
+	print("a&b")
+	print(a&b)
+	print("a|b")
+	print(a|b)
+	print("Complement of c in a")
+	print(c.complement(a))
+	print("~getNonNBED(\"s\", \"ACNNNGTNA\")")
+	print(~getNonNBED("s", "ACNNNGTNA"))
+	print("Query BED")
+	e = BED(BEDcoordinates("a", 2, 10), BEDcoordinates("a", 20, 30), BEDcoordinates("a", 50, 60))
+	print("e.query(\"a\", 8, 25)")
+	print([str(b) for b in e.query("a", 8, 25)])
+	print("e.queryPoint(\"a\", 10)")
+	print([str(b) for b in e.queryPoint("a", 10)])
+	print("e.nearest(\"a\", 42)")
+	print(e.nearest("a", 42))
 
 	# Create huge BED
 	import random
@@ -606,6 +1377,26 @@ if __name__ == "__main__":
 	print(a)
 	print("Ran in " + str(round(endTime - startTime)) + "s")
 
+	# Testing BED files
+	print("TESTING BED FILES")
+	a.toFile("testFile.bed")
+	print("readBED(\"testFile.bed\") == a")
+	print(str(readBED("testFile.bed")) == str(a))
+	a.toBinary("testFile.bedb")
+	print("readBinaryBED(\"testFile.bedb\") == a")
+	print(str(readBinaryBED("testFile.bedb")) == str(a))
+
+	# Testing Depth class
+	print("TESTING Depth CLASS")
+	d = Depth([BEDcoordinates("a", 0, 100), BEDcoordinates("a", 50, 150), BEDcoordinates("a", 60, 70), BEDcoordinates("b", 10, 20)])
+	print(d)
+	print("d.atLeast(2)")
+	print(d.atLeast(2))
+	print("d.histogram()")
+	print(d.histogram())
+	print("d.histogram(genome = BED(BEDcoordinates(\"a\", 0, 200)))")
+	print(d.histogram(genome = BED(BEDcoordinates("a", 0, 200))))
+
 	# Testing fasta classes
 	print("TESTING Fasta CLASS")
 	with open("testFile.fasta", "w") as file:
@@ -633,3 +1424,6 @@ if __name__ == "__main__":
 	print("seq1 = f.getSeqFromID(\"Sequence1\")")
 	seq1 = f.getSeqFromID("Sequence1")
 	print(seq1)
+	print("f.windowProfile(100, step = 50)")
+	for row in f.windowProfile(100, step = 50):
+		print(row)